@@ -6,6 +6,7 @@ This script starts the Tauri dev server with proper environment setup.
 """
 
 import os
+import shutil
 import sys
 import subprocess
 from pathlib import Path
@@ -17,42 +18,32 @@ def main():
     # Rust toolchain path (adjust if your username is different)
     rust_path = Path.home() / ".rustup" / "toolchains" / "stable-x86_64-pc-windows-msvc" / "bin"
     
-    # Get current PATH
-    current_path = os.environ.get("PATH", "")
+    # Get current PATH entries, skipping empty ones so an empty PATH does not turn
+    # into "<rust_bin>:" (an implicit current-directory entry)
+    path_entries = [entry for entry in os.environ.get("PATH", "").split(os.pathsep) if entry]
     
-    # Add Rust to PATH if not already there
+    # Add Rust to PATH if not already an entry (exact match, not a substring test)
     rust_bin = str(rust_path)
-    if rust_bin not in current_path:
-        os.environ["PATH"] = f"{rust_bin};{current_path}"
+    if rust_bin not in path_entries:
+        os.environ["PATH"] = os.pathsep.join([rust_bin, *path_entries])
         print(f"Added Rust to PATH: {rust_bin}")
     
-    # Verify cargo is accessible
-    try:
-        result = subprocess.run(
-            ["cargo", "--version"],
-            capture_output=True,
-            text=True,
-            check=True,
-            shell=(sys.platform == "win32")
-        )
-        print(f"✓ Found: {result.stdout.strip()}")
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    # Verify cargo is accessible (a PATH lookup, no need to spawn `cargo --version`)
+    cargo = shutil.which("cargo")
+    if cargo is None:
         print("✗ Error: Cargo not found. Please ensure Rust is installed and in PATH.")
         sys.exit(1)
+    print(f"✓ Found cargo: {cargo}")
     
-    # Verify npm is accessible
-    try:
-        result = subprocess.run(
-            ["npm", "--version"],
-            capture_output=True,
-            text=True,
-            check=True,
-            shell=(sys.platform == "win32")
-        )
-        print(f"✓ Found npm: {result.stdout.strip()}")
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    # Verify npm is accessible (resolves npm.cmd on Windows via PATHEXT)
+    npm = shutil.which("npm")
+    if npm is None:
         print("✗ Error: npm not found. Please ensure Node.js is installed and in PATH.")
         sys.exit(1)
+    # A relative or empty PATH entry yields a relative path; pin it before the chdir
+    # below so the exec still finds npm.
+    npm = os.path.abspath(npm)
+    print(f"✓ Found npm: {npm}")
     
     # Change to project directory
     os.chdir(project_root)
@@ -60,22 +51,23 @@ def main():
     print("\nStarting Tauri development server...")
     print("=" * 50)
     
-    # Run npm tauri:dev
-    # On Windows, use shell=True to find npm.cmd
+    # On POSIX, replace this process with npm so the dev server receives signals
+    # directly and no Python interpreter stays resident for its lifetime.
+    if sys.platform != "win32":
+        sys.stdout.flush()
+        os.execv(npm, [npm, "run", "tauri:dev"])
+    
+    # Windows has no real exec (os.exec* spawns a child and exits, detaching it from
+    # the console), so keep the child process there.
+    # Use shell=True to find npm.cmd
     try:
-        if sys.platform == "win32":
-            subprocess.run(["npm", "run", "tauri:dev"], check=True, shell=True)
-        else:
-            subprocess.run(["npm", "run", "tauri:dev"], check=True)
+        subprocess.run(["npm", "run", "tauri:dev"], check=True, shell=True)
     except KeyboardInterrupt:
         print("\n\nStopped by user.")
         sys.exit(0)
     except subprocess.CalledProcessError as e:
         print(f"\n✗ Error running dev server: {e}")
         sys.exit(1)
-    except FileNotFoundError:
-        print("\n✗ Error: npm not found. Please ensure Node.js is installed and in PATH.")
-        sys.exit(1)
 
 if __name__ == "__main__":
     main()
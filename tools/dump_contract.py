@@ -1,17 +1,66 @@
 from pathlib import Path
-from docx import Document
 import sys
+import zipfile
+
+from lxml import etree
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# Text equivalents of run content, matching what python-docx's Paragraph.text yields.
+RUN_CONTENT_TEXT = {
+    f"{W}tab": "\t",
+    f"{W}ptab": "\t",
+    f"{W}cr": "\n",
+    f"{W}noBreakHyphen": "-",
+}
+
+
+def run_text(run: etree._Element) -> str:
+    parts = []
+    for child in run:
+        if child.tag == f"{W}t":
+            parts.append(child.text or "")
+        elif child.tag == f"{W}br":
+            # Only text-wrapping breaks are line breaks; page/column breaks have no text.
+            if child.get(f"{W}type", "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            parts.append(RUN_CONTENT_TEXT.get(child.tag, ""))
+    return "".join(parts)
+
+
+def paragraph_text(p: etree._Element) -> str:
+    parts = []
+    for child in p:
+        if child.tag == f"{W}r":
+            parts.append(run_text(child))
+        elif child.tag == f"{W}hyperlink":
+            parts.extend(run_text(run) for run in child.iterchildren(f"{W}r"))
+    return "".join(parts)
+
 
 source = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("contracts/Contract of Sale.docx")
 dump_path = Path(sys.argv[2]) if len(sys.argv) > 2 else Path("contracts/contract_dump.txt")
 
-doc = Document(source)
-
-with dump_path.open("w", encoding="utf-8") as f:
-    for i, paragraph in enumerate(doc.paragraphs):
-        text = paragraph.text.strip()
+# Stream word/document.xml instead of loading the whole document through python-docx,
+# discarding each body-level paragraph (and anything before it) once it is written.
+# Entities are left unresolved, as python-docx's own parser does, and xml:id values
+# are not indexed since nothing looks them up.
+lines = []
+with zipfile.ZipFile(source) as archive, archive.open("word/document.xml") as fh:
+    i = 0
+    for _, elem in etree.iterparse(fh, tag=f"{W}p", resolve_entities=False, collect_ids=False):
+        parent = elem.getparent()
+        if parent is None or parent.tag != f"{W}body":
+            continue
+        text = paragraph_text(elem).strip()
         if text:
-            f.write(f"{i}: {text}\n")
+            lines.append(f"{i}: {text}\n")
+        i += 1
+        elem.clear()
+        while elem.getprevious() is not None:
+            del parent[0]
 
-print(f"Wrote contract dump to {dump_path} from {source}")
+dump_path.write_text("".join(lines), encoding="utf-8")
 
+print(f"Wrote contract dump to {dump_path} from {source}")
@@ -3,135 +3,266 @@ Update the Contract of Sale template with docxtemplater placeholders.
 Creates a new file contracts/Contract Template.docx preserving the original.
 """
 
+import os
+import re
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from docx import Document
+from docx.oxml.ns import qn
+from docx.oxml.text.paragraph import CT_P
+from lxml import etree
 
 SOURCE_PATH = Path("contracts/Contract of Sale.docx")
 TARGET_PATH = Path("contracts/Contract Template.docx")
 
+# Namespace map and XPath expressions compiled once at import rather than on every
+# element.xpath() call in the per-paragraph helpers.
+_WNS = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+_RUN_TEXT = etree.XPath("./w:r/w:t/text() | ./w:hyperlink/w:r/w:t/text()", namespaces=_WNS)
+_TEXT_NODES = etree.XPath("./w:r/w:t | ./w:hyperlink/w:r/w:t", namespaces=_WNS)
+_NON_PPR_CHILDREN = etree.XPath("./*[not(self::w:pPr)]", namespaces=_WNS)
+_NON_FONT_RPR_CHILDREN = etree.XPath(
+    "./*[not(self::w:rFonts or self::w:sz or self::w:szCs)]", namespaces=_WNS
+)
 
-def replace_paragraph_contains(doc: Document, needle: str, replacement: str) -> None:
-    for paragraph in doc.paragraphs:
-        if needle in paragraph.text:
-            paragraph.text = replacement
-            return
-    raise ValueError(f"Could not find paragraph containing: {needle!r}")
+# Notary block lines: "STATE OF ...)<suffix>" keeps everything from the first ")" on,
+# "COUNTY ...)SS" is rewritten wholesale. The separator may be a non-breaking space,
+# so the prefilter can match raw text without normalizing it first.
+STATE_COUNTY_PATTERN = re.compile(
+    r"STATE[ \xa0]OF[^)]*(?P<state_suffix>\).*)|COUNTY.*\)SS", re.DOTALL
+)
+STATE_COUNTY_PREFIXES = ("STATE OF", "STATE\xa0OF", "COUNTY")
 
+# "paragraph" needles replace the whole text of the first paragraph containing them;
+# "inline" needles are substituted in place in every paragraph containing them.
+PARAGRAPH = "paragraph"
+INLINE = "inline"
 
-def replace_text_in_paragraph(doc: Document, needle: str, replacement: str) -> None:
-    for paragraph in doc.paragraphs:
-        if needle in paragraph.text:
-            paragraph.text = paragraph.text.replace(needle, replacement)
-
-
-def main() -> None:
-    doc = Document(SOURCE_PATH)
-
-    replace_paragraph_contains(
-        doc,
+NEEDLES: list[tuple[str, str, str]] = [
+    (
         "This Agreement dated",
         (
             "This Agreement dated {agreementDate} is between (Buyer: {buyerName}, "
             "{buyerFullAddress}, {buyerPhone}, {buyerEmail}) herein referred to as Buyer "
             "and {breederName} of {kennelName} herein referred to as Breeder."
         ),
-    )
-
-    replace_paragraph_contains(
-        doc,
+        PARAGRAPH,
+    ),
+    (
         "In Consideration of the total sum",
         (
             "In Consideration of the total sum of {salePrice} ({salePriceWords}) and the mutual promises "
             "contained herein, Breeder has agreed to sell, and Buyer has agreed to purchase "
             "{puppyCount} ({maleCount} male, {femaleCount} female) American Bully puppy."
         ),
-    )
-
-    replace_paragraph_contains(doc, "Born on", "Born on {puppyDOBLong}")
-    replace_paragraph_contains(doc, "Sire:", "Sire: {sireName}")
-    replace_paragraph_contains(doc, "Dam:", "Dam: {damName}")
-
-    replace_paragraph_contains(
-        doc,
+        PARAGRAPH,
+    ),
+    ("Born on", "Born on {puppyDOBLong}", PARAGRAPH),
+    ("Sire:", "Sire: {sireName}", PARAGRAPH),
+    ("Dam:", "Dam: {damName}", PARAGRAPH),
+    (
         "The puppy is sold as a pet",
         "{#isPet}The puppy is sold as a pet, with no registration, and must be spayed/neutered at no earlier than 18 months of age no later than two years of age (as early spay/neuter can be detrimental to the dogs overall health and wellness).{/isPet}",
-    )
-
-    replace_paragraph_contains(
-        doc,
+        PARAGRAPH,
+    ),
+    (
         "The puppy is sold with breeding rights",
         "{#isFullRights}The puppy is sold with breeding rights, or “Full Rights\" registration. Buyer will make a good faith effort to show the dog or allow the dog to be shown by the Breeder, to its ABKC and UKC Championship.{/isFullRights}",
-    )
-
-    replace_paragraph_contains(
-        doc,
+        PARAGRAPH,
+    ),
+    (
         "If No Registration",
         "{#isPet}If \"No Registration\" has been selected, this puppy is being sold as pet quality only, intended for companionship with no guarantees as to breeding soundness, show-ability, work ability, trainability, temperament or size at maturity. The Buyer agrees to NO BREEDING of this dog (accidental or intentional).  Buyer is to have the dog altered (Spay/Neuter/Vasectomy/Hysterectomy) by the age of 2 years old (24 months) but no earlier than 18 months of age.{/isPet}",
-    )
-
-    replace_paragraph_contains(
-        doc,
+        PARAGRAPH,
+    ),
+    (
         "The Buyer affirms that their purchase",
         "{#isPet}The Buyer affirms that their purchase is for a \"pet home\" only and not for breeding purposes. If the dog produces a litter without the knowledge and written consent of the Breeder, the Breeder will be entitled to compensation in the amount of $5,000 (Five Thousand Dollars and no Cents) for breach of contract terms. The Buyer herein agrees to pay the Breeder an additional $2,000 (Two Thousand Dollars and no cents) per puppy produced (dead or alive) from the whelping no later than 30 days after the birth of the unwarranted breeding.{/isPet}",
-    )
-
-    replace_paragraph_contains(
-        doc,
+        PARAGRAPH,
+    ),
+    (
         "The General Health Guarantee",
         "{#isPet}The General Health Guarantee also becomes null and void if spay/neuter contract is violated.{/isPet}",
-    )
-
-    replace_text_in_paragraph(doc, "State of ________, County of ________", "State of {state}, County of {county}")
-    replace_text_in_paragraph(
-        doc,
+        PARAGRAPH,
+    ),
+    ("State of ________, County of ________", "State of {state}, County of {county}", INLINE),
+    (
         "State of ___________ County of ____________",
         "State of {state} County of {county}",
-    )
-    replace_text_in_paragraph(
-        doc,
+        INLINE,
+    ),
+    (
         "State of (______), County of (_____)",
         "State of ({state}), County of ({county})",
-    )
-
-    replace_paragraph_contains(doc, "Signed on", "Signed on {signingDate}")
-
-    replace_paragraph_contains(
-        doc,
+        INLINE,
+    ),
+    ("Signed on", "Signed on {signingDate}", PARAGRAPH),
+    (
         "On this _____ day of _________",
         "On this {signingDate}, before me, the undersigned, a Notary Public in and for said State, personally appeared _____________________, personally known to me or proved to me on the basis of satisfactory evidence to be the individual whose name is subscribed to the within Instrument and acknowledged to me that s/he/they executed the same in her/his/their capacity, and that by her/his/their signature on the instrument, the individuals, or the person upon behalf of which the individuals acted, executed the instrument.",
-    )
-
-    replace_paragraph_contains(
-        doc,
+        PARAGRAPH,
+    ),
+    (
         "This Agreement is made and entered into this ______ day of",
         "This Agreement is made and entered into this {agreementDate}",
-    )
-    replace_paragraph_contains(
-        doc,
+        PARAGRAPH,
+    ),
+    (
         "By and between",
         "By and between {breederName} (Breeder) and {buyerName} (Buyer),",
-    )
-    replace_paragraph_contains(
-        doc,
+        PARAGRAPH,
+    ),
+    (
         "For the purpose of setting forth the terms",
         "For the purpose of setting forth the terms and conditions of purchase by the Buyer of a Purebred American Bully from the litter born on {puppyDOBLong}. Out of {sireName} (Sire), and {damName} (Dam). "
         "For {salePrice} the Breeder agrees to sell and buyer agrees to purchase a {femaleCount} female, {maleCount} male companion puppy from the litter described above subject to the following terms.",
-    )
-
-    for paragraph in doc.paragraphs:
-        normalized = paragraph.text.replace("\xa0", " ")
-        stripped = normalized.strip()
-        if stripped.startswith("STATE OF") and ")" in stripped:
-            suffix_index = stripped.find(")")
-            suffix = stripped[suffix_index:]
-            paragraph.text = f"STATE OF {{state}} {suffix}"
-        if stripped.startswith("COUNTY") and ")SS" in stripped:
-            paragraph.text = "COUNTY OF {county} )SS.:"
-
-    doc.save(TARGET_PATH)
+        PARAGRAPH,
+    ),
+]
+
+
+def body_paragraphs(doc: Document) -> Iterator[CT_P]:
+    """Lazily yield the body-level <w:p> elements, the same set doc.paragraphs wraps."""
+    return doc.element.body.iterchildren(qn("w:p"))
+
+
+def raw_paragraph_text(p: CT_P) -> str:
+    """Join the <w:t> text of a paragraph's runs, skipping the Paragraph.text machinery.
+
+    Tab and break characters are dropped, so this is only suitable as a prefilter for
+    needles that contain neither.
+    """
+    return "".join(_RUN_TEXT(p))
+
+
+def compile_needle_pattern(indices: list[int]) -> re.Pattern[str]:
+    """One alternation over the given NEEDLES entries, used as a paragraph prefilter."""
+    return re.compile("|".join(re.escape(NEEDLES[i][0]) for i in indices))
+
+
+def set_paragraph_text(p: CT_P, text: str) -> None:
+    """Replace the text of a paragraph in place, keeping the font of its first run.
+
+    Like the Paragraph.text setter, everything but <w:pPr> is removed. The first run is
+    reused with only its font family and size; emphasis such as bold or underline is
+    dropped, since it usually belonged to a heading or label rather than the whole text.
+    """
+    runs = p.r_lst
+    if runs:
+        first_run = runs[0]
+        for child in _NON_PPR_CHILDREN(p):
+            if child is not first_run:
+                p.remove(child)
+        if first_run.rPr is not None:
+            for child in _NON_FONT_RPR_CHILDREN(first_run.rPr):
+                first_run.rPr.remove(child)
+    else:
+        p.clear_content()
+        first_run = p.add_r()
+    first_run.text = text
+
+
+def replace_in_runs(p: CT_P, needle: str, replacement: str) -> None:
+    """Substitute `needle` inside each <w:t> that contains it, leaving other runs untouched.
+
+    Occurrences split across several runs are not found; callers compare the resulting
+    paragraph text to detect that.
+    """
+    for t in _TEXT_NODES(p):
+        if t.text and needle in t.text:
+            t.text = t.text.replace(needle, replacement)
+            if t.text != t.text.strip():
+                t.set(qn("xml:space"), "preserve")
+
+
+def apply_needles(p_elements: Iterable[CT_P]) -> None:
+    """Apply every entry of NEEDLES in a single pass over the document paragraphs."""
+    pending = list(range(len(NEEDLES)))
+    pattern = compile_needle_pattern(pending)
+    for p in p_elements:
+        if not pattern.search(raw_paragraph_text(p)):
+            continue
+
+        text = p.text
+        updated = text
+        consumed = False
+        inline_hits = []
+        # The alternation only proves some needle is present; its matches cannot report
+        # needles that overlap or share a start position, so confirm each pending one.
+        for index in tuple(pending):
+            needle, replacement, mode = NEEDLES[index]
+            if needle not in updated:
+                continue
+            if mode == PARAGRAPH:
+                updated = replacement
+                pending.remove(index)
+                consumed = True
+            else:
+                updated = updated.replace(needle, replacement)
+                inline_hits.append(index)
+
+        if updated == text:
+            pass
+        elif consumed:
+            set_paragraph_text(p, updated)
+        else:
+            # Inline needles only: edit the runs holding them so the rest of the paragraph
+            # keeps its formatting, and rewrite the run tree only if a needle spans runs.
+            for index in inline_hits:
+                needle, replacement, _ = NEEDLES[index]
+                replace_in_runs(p, needle, replacement)
+            if p.text != updated:
+                set_paragraph_text(p, updated)
+
+        # Paragraph needles are unique anchors: once matched, later paragraphs no longer
+        # test for them, leaving only the inline needles for the rest of the document.
+        if consumed:
+            if not pending:
+                break
+            pattern = compile_needle_pattern(pending)
+
+    for index in pending:
+        needle, _, mode = NEEDLES[index]
+        if mode == PARAGRAPH:
+            raise ValueError(f"Could not find paragraph containing: {needle!r}")
+
+
+def save_atomic(doc: Document, path: Path) -> None:
+    """Save to a temporary file beside `path` and rename it over the target.
+
+    An interrupted save leaves the previous template intact instead of a truncated file.
+    """
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    try:
+        doc.save(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def main() -> None:
+    doc = Document(SOURCE_PATH)
+
+    apply_needles(body_paragraphs(doc))
+
+    for p in body_paragraphs(doc):
+        # A C-level startswith rejects almost every paragraph before the regex runs.
+        raw_text = raw_paragraph_text(p).strip()
+        if not raw_text.startswith(STATE_COUNTY_PREFIXES) or not STATE_COUNTY_PATTERN.match(raw_text):
+            continue
+
+        match = STATE_COUNTY_PATTERN.match(p.text.replace("\xa0", " ").strip())
+        if match is None:
+            continue
+        if match["state_suffix"] is not None:
+            set_paragraph_text(p, f"STATE OF {{state}} {match['state_suffix']}")
+        else:
+            set_paragraph_text(p, "COUNTY OF {county} )SS.:")
+
+    save_atomic(doc, TARGET_PATH)
     print(f"Wrote updated template to {TARGET_PATH}")
 
 
 if __name__ == "__main__":
     main()
-